@@ -5,13 +5,28 @@ import datetime # Make sure datetime module is imported
 from datetime import timedelta
 import time
 import folium
-from streamlit_folium import folium_static
-import pandas as pd
+
+try:
+    import pydeck as pdk
+except ImportError:  # fall back to the Folium map if pydeck is unavailable
+    pdk = None
 import numpy as np
 
+from iss_kernels import ecef_to_geodetic, wrap_longitudes
+
 # --- Global variables and initial setup ---
-# Load timescale. This is typically done once.
-ts = load.timescale()
+
+
+@st.cache_resource
+def get_timescale():
+    """
+    Loads the Skyfield timescale once per server process.
+    Cached so leap-second data is not re-read on every Streamlit rerun.
+    """
+    return load.timescale()
+
+
+ts = get_timescale()
 iss_satellite = None
 
 # Determine the local timezone once
@@ -19,6 +34,17 @@ iss_satellite = None
 local_tz = datetime.datetime.now().astimezone().tzinfo
 
 
+@st.cache_resource
+def get_http_session():
+    """
+    Shared requests.Session so TLE refreshes reuse the TCP/TLS connection
+    to Celestrak and download the station list compressed.
+    """
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
 @st.cache_data(ttl=3600)  # Cache TLE for 1 hour to reduce API calls to Celestrak
 def fetch_iss_tle_cached():
     """
@@ -27,49 +53,114 @@ def fetch_iss_tle_cached():
     """
     url = "https://celestrak.org/NORAD/elements/stations.txt"
     try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-        lines = response.text.splitlines()
-
-        iss_tle_lines = []
-        for i in range(len(lines)):
-            # "ISS (ZARYA)" is the common name in Celestrak's stations.txt for the ISS
-            if "ISS (ZARYA)" in lines[i]:
-                iss_tle_lines.append(lines[i].strip())
-                iss_tle_lines.append(lines[i + 1].strip())
-                iss_tle_lines.append(lines[i + 2].strip())
-                break
-
-        if len(iss_tle_lines) == 3:
-            return iss_tle_lines[0], iss_tle_lines[1], iss_tle_lines[2]
-        else:
-            st.error("ISS TLE data not found in the response from Celestrak.")
-            return None, None, None
+        # Stream the station list and stop as soon as the ISS entry is
+        # found, instead of downloading and decoding the whole file first.
+        # "ISS (ZARYA)" is the common name in Celestrak's stations.txt.
+        with get_http_session().get(url, stream=True, timeout=5) as response:
+            response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+            lines = response.iter_lines(decode_unicode=True)
+            for line in lines:
+                if "ISS (ZARYA)" in line:
+                    return line.strip(), next(lines).strip(), next(lines).strip()
+
+        st.error("ISS TLE data not found in the response from Celestrak.")
+        return None, None, None
 
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching TLE data from Celestrak: {e}")
         return None, None, None
 
 
-def get_iss_current_location(satellite_obj):
+@st.cache_resource(ttl=3600)  # Rebuild the satellite object only when the TLE cache can refresh
+def get_iss_satellite():
     """
-    Calculates the current latitude and longitude of the ISS.
+    Builds the Skyfield EarthSatellite for the ISS from the cached TLE data.
+    Cached so the TLE parse and SGP4 initialization survive Streamlit reruns.
     """
-    if satellite_obj is None:
-        return None, None
-    t = ts.now()
-    geocentric = satellite_obj.at(t)
+    name, line1, line2 = fetch_iss_tle_cached()
+    if name and line1 and line2:
+        return EarthSatellite(line1, line2, name, ts)
+    return None
 
-    # Corrected line: Get the GeographicPosition object first
-    subpoint = geocentric.subpoint()
 
-    # Then access its attributes for lat, lon, and elevation
-    lat = subpoint.latitude.degrees
-    lon = subpoint.longitude.degrees
-    # You can also get elevation if needed, but for this function, we only return lat/lon
-    # elevation = subpoint.elevation.km
+@st.cache_data(ttl=5)  # The ISS moves ~8 km/s, but reruns within a few seconds can reuse the last fix
+def get_iss_location_and_track(_satellite_obj, minutes_ahead=90, step_minutes=1):
+    """
+    Calculates the current latitude/longitude of the ISS plus the ground
+    track for the next `minutes_ahead` minutes in one SGP4 evaluation.
+    Cached briefly so unrelated widget reruns skip the Skyfield work.
+    The satellite argument is underscore-prefixed so Streamlit does not
+    try to hash it.
+    """
+    if _satellite_obj is None:
+        return None, None, None, None
+
+    t_start = ts.now()
+    times = t_start + np.arange(0, minutes_ahead, step_minutes) / (24 * 60)  # Add minutes in days
 
-    return lat, lon
+    # Drive the C++ SGP4 core directly for the whole sample sequence,
+    # bypassing Skyfield's per-sample position objects and frame setup.
+    # The Satrec already lives on the cached EarthSatellite as .model.
+    _, r_teme, _ = _satellite_obj.model.sgp4_array(times.whole, times.ut1_fraction)
+    x_teme, y_teme, z_km = r_teme.T  # km
+
+    # Rotate TEME into the Earth-fixed frame by Greenwich mean sidereal
+    # time, then convert to WGS84 lat/lon. Ignoring polar motion costs
+    # ~0.02 degrees, invisible at plot resolution.
+    theta = times.gmst * (np.pi / 12.0)  # hours -> radians
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    x_km = x_teme * cos_t + y_teme * sin_t
+    y_km = -x_teme * sin_t + y_teme * cos_t
+    latitudes, longitudes = ecef_to_geodetic(x_km, y_km, z_km)
+
+    # The first sample is at t_start, i.e. the current position
+    return latitudes[0], longitudes[0], latitudes, longitudes
+
+
+@st.cache_data(ttl=5)
+def render_map_html(lat, lon, points_tuple):
+    """
+    Builds the fallback Folium map and renders it straight to HTML,
+    cached by position and track so reruns skip folium_static's repeated
+    Jinja2 template rendering and feature traversal.
+    """
+    m = folium.Map(location=[lat, lon], zoom_start=2)
+    folium.Marker(
+        location=[lat, lon],
+        tooltip=f"ISS @ {lat:.2f}, {lon:.2f}",
+        icon=folium.Icon(color='red', icon='satellite', prefix='fa')
+    ).add_to(m)
+    folium.PolyLine(list(points_tuple), color='blue', weight=2.5, opacity=1).add_to(m)
+    return m.get_root().render()
+
+
+@st.cache_resource
+def get_observer(lat_rounded, lon_rounded, elevation_m):
+    """
+    Memoizes Topos construction by rounded coordinates, since users often
+    re-predict for the same (or default) location.
+    """
+    return Topos(latitude_degrees=lat_rounded, longitude_degrees=lon_rounded, elevation_m=elevation_m)
+
+
+@st.cache_resource
+def get_observer_difference(_satellite_obj, tle_epoch, lat_rounded, lon_rounded, elevation_m):
+    """
+    Memoizes the satellite-minus-observer VectorSum for a rounded
+    location. The satellite argument is underscore-prefixed so Streamlit
+    does not try to hash it; tle_epoch stands in for it in the cache key
+    so a refreshed TLE invalidates the memoized difference.
+    """
+    return _satellite_obj - get_observer(lat_rounded, lon_rounded, elevation_m)
+
+
+def format_pass_time(dt, tz_suffix):
+    """
+    Formats a pass timestamp like strftime('%Y-%m-%d %H:%M:%S %Z%z') but
+    through the much cheaper isoformat, with the timezone suffix computed
+    once per pass and appended.
+    """
+    return dt.replace(tzinfo=None).isoformat(sep=" ", timespec="seconds") + tz_suffix
 
 
 def calculate_iss_passes_for_location(satellite_obj, latitude, longitude, elevation_m=0, days_ahead=2):
@@ -79,7 +170,11 @@ def calculate_iss_passes_for_location(satellite_obj, latitude, longitude, elevat
     if satellite_obj is None:
         return []
 
-    observer = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation_m)
+    # Round to the precision of the lat/lon inputs (format="%.4f") so
+    # repeated predictions for the same spot hit the memoized builders
+    lat_rounded = round(latitude, 4)
+    lon_rounded = round(longitude, 4)
+    observer = get_observer(lat_rounded, lon_rounded, elevation_m)
 
     t0 = ts.now()
     t1 = ts.utc(t0.utc_datetime() + timedelta(days=days_ahead))
@@ -89,26 +184,44 @@ def calculate_iss_passes_for_location(satellite_obj, latitude, longitude, elevat
 
     passes = []
     # A full pass consists of three events: rise, culmination, set
-    for i in range(len(events)):
-        if i % 3 == 0 and i + 2 < len(events):
-            rise_time = t[i].astimezone(local_tz)
-            culmination_time = t[i + 1].astimezone(local_tz)
-            set_time = t[i + 2].astimezone(local_tz)
-
-            duration_seconds = (set_time - rise_time).total_seconds()
-            duration_minutes = duration_seconds / 60
-
-            # Calculate peak altitude at culmination
-            alt, az, distance = (satellite_obj - observer).at(t[i + 1]).altaz()
-            peak_altitude = alt.degrees
-
-            passes.append({
-                "Rise Time": rise_time.strftime('%Y-%m-%d %H:%M:%S %Z%z'),
-                "Culmination Time": culmination_time.strftime('%Y-%m-%d %H:%M:%S %Z%z'),
-                "Set Time": set_time.strftime('%Y-%m-%d %H:%M:%S %Z%z'),
-                "Peak Altitude (deg)": f"{peak_altitude:.2f}",
-                "Duration (min)": f"{duration_minutes:.2f}"
-            })
+    rise_indices = np.arange(0, len(events) - 2, 3)
+    if len(rise_indices) == 0:
+        return passes
+
+    # Calculate peak altitude at every culmination in one vectorized call,
+    # instead of paying Skyfield's frame-conversion setup once per pass
+    # jdsatepoch alone is only the whole-day part of the TLE epoch; include
+    # the fractional part so same-day TLE refreshes also invalidate the cache
+    tle_epoch = (satellite_obj.model.jdsatepoch, satellite_obj.model.jdsatepochF)
+    difference = get_observer_difference(
+        satellite_obj, tle_epoch, lat_rounded, lon_rounded, elevation_m)
+    t_culminations = t[rise_indices + 1]
+    # Warm the cached precession/nutation matrices for the whole array up
+    # front. Assigned to _ so Streamlit's magic does not st.write() them.
+    _ = t_culminations.MT
+    _ = t_culminations.gast
+    alt, az, distance = difference.at(t_culminations).altaz()
+    peak_altitudes = np.atleast_1d(alt.degrees)
+
+    for k, i in enumerate(rise_indices):
+        rise_time = t[i].astimezone(local_tz)
+        culmination_time = t[i + 1].astimezone(local_tz)
+        set_time = t[i + 2].astimezone(local_tz)
+
+        duration_seconds = (set_time - rise_time).total_seconds()
+        duration_minutes = duration_seconds / 60
+
+        peak_altitude = peak_altitudes[k]
+
+        # All three times of a pass share the same timezone suffix
+        tz_suffix = rise_time.strftime(' %Z%z')
+        passes.append({
+            "Rise Time": format_pass_time(rise_time, tz_suffix),
+            "Culmination Time": format_pass_time(culmination_time, tz_suffix),
+            "Set Time": format_pass_time(set_time, tz_suffix),
+            "Peak Altitude (deg)": format(peak_altitude, ".2f"),
+            "Duration (min)": format(duration_minutes, ".2f")
+        })
     return passes
 
 
@@ -118,60 +231,69 @@ st.set_page_config(page_title="ISS Live Tracker", layout="wide")
 st.title("🛰️ Live International Space Station (ISS) Tracker")
 st.markdown("Track the ISS in real-time and predict its passes over your location!")
 
-# Fetch TLE data once at the start and create the satellite object
-name, line1, line2 = fetch_iss_tle_cached()
-if name and line1 and line2:
-    iss_satellite = EarthSatellite(line1, line2, name, ts)
-else:
+# Fetch TLE data once at the start and create the satellite object (cached across reruns)
+iss_satellite = get_iss_satellite()
+if iss_satellite is None:
     st.error("Could not initialize ISS tracking due to TLE fetch failure. Please refresh.")
 
 # Current ISS Location Section
 st.subheader("Current ISS Location")
 if iss_satellite:
-    current_lat, current_lon = get_iss_current_location(iss_satellite)
+    # Reuse the last fix within the same 5-second bucket via session state,
+    # so reruns skip the Skyfield work even when Streamlit's data cache is
+    # disabled (complements the ttl=5 on get_iss_location_and_track)
+    track_bucket = int(time.time() // 5)
+    cached_track = st.session_state.get('iss_track')
+    if cached_track and cached_track['bucket'] == track_bucket:
+        current_lat, current_lon, latitudes, longitudes = cached_track['data']
+    else:
+        current_lat, current_lon, latitudes, longitudes = get_iss_location_and_track(iss_satellite)
+        st.session_state['iss_track'] = {
+            'bucket': track_bucket,
+            'data': (current_lat, current_lon, latitudes, longitudes)
+        }
     if current_lat is not None and current_lon is not None:
         st.write(f"**Latitude:** `{current_lat:.4f}` **Longitude:** `{current_lon:.4f}`")
 
-        # Create a Folium map centered on the current ISS location
-        m = folium.Map(location=[current_lat, current_lon], zoom_start=2)
-        folium.Marker(
-            location=[current_lat, current_lon],
-            tooltip=f"ISS @ {current_lat:.2f}, {current_lon:.2f}",
-            icon=folium.Icon(color='red', icon='satellite', prefix='fa')
-        ).add_to(m)
-
-        # Plot ground track for next 90 minutes
-        minutes_ahead = 90
-
-        # Corrected: Create Skyfield time objects for the sequence directly.
-        t_start = ts.now()  # Get the current Skyfield time object
-        times = t_start + np.arange(0, minutes_ahead, 5) / (24 * 60)  # Add minutes in days
-
-        geocentric_points = iss_satellite.at(times)
-
-        # Corrected approach for getting arrays of lat/lon from multiple points:
-        subpoints = geocentric_points.subpoint()  # This returns a GeographicPosition object for each time
-        latitudes = subpoints.latitude.degrees
-        longitudes = subpoints.longitude.degrees
-        # If you needed elevations, you would get them as:
-        # elevations = subpoints.elevation.km
+        # Plot the current position and the 90-minute ground track
+        # (computed alongside the current location above)
 
         # Adjust longitudes to wrap around for continuous path visualization over the map boundary
-        wrapped_longitudes = [longitudes[0]]
-        for i in range(1, len(longitudes)):
-            diff = longitudes[i] - longitudes[i - 1]
-            if diff > 180:
-                wrapped_longitudes.append(longitudes[i] - 360)
-            elif diff < -180:
-                wrapped_longitudes.append(longitudes[i] + 360)
-            else:
-                wrapped_longitudes.append(longitudes[i])
-
-        points = list(zip(latitudes, wrapped_longitudes))
-        folium.PolyLine(points, color='blue', weight=2.5, opacity=1).add_to(m)
-
-        # Display the map in Streamlit
-        folium_static(m, width=700, height=500)
+        wrapped_longitudes = wrap_longitudes(longitudes)
+
+        if pdk is not None:
+            # deck.gl renders the layers on the browser GPU, so reruns skip
+            # the server-side HTML serialization Folium would need
+            track = np.empty((len(latitudes), 2))
+            track[:, 0] = wrapped_longitudes  # deck.gl expects [lon, lat]
+            track[:, 1] = latitudes
+            st.pydeck_chart(pdk.Deck(
+                initial_view_state=pdk.ViewState(latitude=current_lat, longitude=current_lon, zoom=1),
+                layers=[
+                    pdk.Layer(
+                        'PathLayer',
+                        [{"path": track.tolist()}],
+                        get_path='path',
+                        get_color=[0, 0, 255],
+                        width_min_pixels=2,
+                    ),
+                    pdk.Layer(
+                        'ScatterplotLayer',
+                        [{"position": [current_lon, current_lat]}],
+                        get_position='position',
+                        get_radius=50000,
+                        get_fill_color=[255, 0, 0],
+                    ),
+                ],
+            ))
+        else:
+            # Fallback: Folium map rendered to raw HTML once per distinct
+            # position/track and injected directly, skipping folium_static
+            points = np.empty((len(latitudes), 2))
+            points[:, 0] = latitudes
+            points[:, 1] = wrapped_longitudes
+            map_html = render_map_html(current_lat, current_lon, tuple(map(tuple, points.tolist())))
+            st.components.v1.html(map_html, width=700, height=500)
     else:
         st.warning("Could not retrieve current ISS location.")
 else:
@@ -180,24 +302,29 @@ else:
 # ISS Pass Prediction Section
 st.subheader("Predict ISS Passes Over Your Location\n(Adjust your location latitude and longitude below, default is New Delhi Coordinates)")
 
-col1, col2, col3 = st.columns(3)
-with col1:
-    # Defaulting to Delhi, India coordinates as per current context.
-    user_lat = st.number_input("Your Latitude:", min_value=-90.0, max_value=90.0, value=28.7041, format="%.4f")
-with col2:
-    user_lon = st.number_input("Your Longitude:", min_value=-180.0, max_value=180.0, value=77.1025, format="%.4f")
-with col3:
-    days_to_predict = st.slider("Days to Predict:", min_value=1, max_value=7, value=2)
-
-if st.button("Predict Passes"):
+# A form batches the three inputs so adjusting them does not trigger a
+# rerun each; only the submit button does
+with st.form("pass_prediction"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        # Defaulting to Delhi, India coordinates as per current context.
+        user_lat = st.number_input("Your Latitude:", min_value=-90.0, max_value=90.0, value=28.7041, format="%.4f")
+    with col2:
+        user_lon = st.number_input("Your Longitude:", min_value=-180.0, max_value=180.0, value=77.1025, format="%.4f")
+    with col3:
+        days_to_predict = st.slider("Days to Predict:", min_value=1, max_value=7, value=2)
+    submitted = st.form_submit_button("Predict Passes")
+
+if submitted:
     if iss_satellite:
         with st.spinner(f"Calculating passes for {days_to_predict} days..."):
             passes = calculate_iss_passes_for_location(iss_satellite, user_lat, user_lon, days_ahead=days_to_predict)
             if passes:
                 st.success(
                     f"Found {len(passes)} passes for Lat: {user_lat:.4f}, Lon: {user_lon:.4f} in the next {days_to_predict} days.")
-                passes_df = pd.DataFrame(passes)
-                st.dataframe(passes_df)
+                # Streamlit renders a list of dicts directly; no need to build
+                # a DataFrame for a handful of rows
+                st.dataframe(passes, width='stretch')
             else:
                 st.info(
                     f"No ISS passes predicted for Lat: {user_lat:.4f}, Lon: {user_lon:.4f} in the next {days_to_predict} days.")
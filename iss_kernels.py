@@ -0,0 +1,65 @@
+"""
+Compiled numeric kernels for the ISS tracker.
+
+The per-rerun inner loops (date-line longitude unwrapping and the
+TEME/ECEF -> WGS84 geodetic conversion) are compiled with numba when it
+is available, removing Python interpreter overhead. Without numba the
+same functions run as plain Python/NumPy, so the app works either way.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is an optional accelerator
+    njit = None
+
+# WGS84 ellipsoid constants
+WGS84_A_KM = 6378.137
+WGS84_E2 = (1.0 / 298.257223563) * (2.0 - 1.0 / 298.257223563)
+
+
+def wrap_longitudes(longitudes):
+    """
+    Unwraps a longitude sequence in degrees so the ground track draws as
+    a continuous line across the +/-180 boundary. The +/-360 offset is
+    cumulative: every sample after a crossing stays shifted, so the path
+    never snaps back across the map.
+    """
+    out = np.empty_like(longitudes)
+    out[0] = longitudes[0]
+    offset = 0.0
+    for i in range(1, longitudes.size):
+        diff = longitudes[i] - longitudes[i - 1]
+        if diff > 180.0:
+            offset -= 360.0
+        elif diff < -180.0:
+            offset += 360.0
+        out[i] = longitudes[i] + offset
+    return out
+
+
+def ecef_to_geodetic(x_km, y_km, z_km):
+    """
+    Converts Earth-fixed (ITRF/ECEF) coordinates in km to WGS84 geodetic
+    latitude and longitude in degrees, using a few fixed-point iterations
+    (plenty of accuracy at ISS altitude).
+    """
+    longitude = np.degrees(np.arctan2(y_km, x_km))
+    p = np.hypot(x_km, y_km)
+    lat = np.arctan2(z_km, p * (1.0 - WGS84_E2))
+    for _ in range(3):
+        sin_lat = np.sin(lat)
+        n = WGS84_A_KM / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+        lat = np.arctan2(z_km + WGS84_E2 * n * sin_lat, p)
+    return np.degrees(lat), longitude
+
+
+if njit is not None:
+    wrap_longitudes = njit(cache=True, fastmath=True)(wrap_longitudes)
+    ecef_to_geodetic = njit(cache=True, fastmath=True)(ecef_to_geodetic)
+
+    # Warm the on-disk compilation cache at import so the first rerun
+    # does not pay the JIT cost
+    _dummy = np.array([0.0, 1.0])
+    wrap_longitudes(_dummy)
+    ecef_to_geodetic(_dummy, _dummy, _dummy)